@@ -0,0 +1,15 @@
+-- Migration: Add questions recency index
+-- Version: 006
+-- Description: Composite index for the latest-questions lookup
+-- Author: Developer
+-- Date: 2026-10-16
+
+-- Migration Up (Apply changes)
+-- The report pulls a company's most recent questions (ORDER BY created_at DESC LIMIT 10)
+CREATE INDEX IF NOT EXISTS idx_questions_company_created
+  ON questions(company_id, created_at DESC);
+
+-- ROLLBACK SQL (automatically extracted by migration system)
+/*ROLLBACK_START
+DROP INDEX IF EXISTS idx_questions_company_created;
+ROLLBACK_END*/
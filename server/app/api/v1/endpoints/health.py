@@ -5,6 +5,7 @@ Provides health checks and server information
 
 import os
 import sys
+import asyncio
 from pathlib import Path
 from datetime import datetime
 from typing import List
@@ -18,14 +19,18 @@ from app.models.api.responses import HealthResponse
 router = APIRouter(tags=["health"])
 logger = setup_logger('financial-data-api')
 
+def _ping_database():
+    """Run SELECT 1 on a pooled connection"""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+
 @router.get("/health", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint with database connectivity test"""
     try:
-        # Test database connection
-        with get_db_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute("SELECT 1")
+        # Test database connection without blocking the event loop
+        await asyncio.to_thread(_ping_database)
         db_connected = True
     except Exception as e:
         log_with_context(logger, 'warning', 'Database health check failed', error=str(e))
@@ -3,7 +3,10 @@ Reports endpoint for report generation and listing
 Handles report generation and file serving
 """
 
+import os
 import sys
+import asyncio
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime
 from typing import List, Dict, Any, Optional
@@ -13,6 +16,7 @@ from fastapi import APIRouter, HTTPException
 from app.utils.utils import get_db_connection
 from app.utils.logging_config import setup_logger, log_with_context
 from app.services.pipeline_processor import FinancialDataProcessor
+from app.api.v1.endpoints.upload import ALLOWED_EXTENSIONS
 from app.models.api.requests import ReportRequest
 from app.models.api.responses import ReportResponse
 from app.core.config import settings
@@ -22,25 +26,75 @@ logger = setup_logger('financial-data-api')
 processor = FinancialDataProcessor()
 
 REPORTS_DIR = settings.project_root / "reports"
+DATA_DIR = settings.project_root / "data"
+REPORT_EXTENSIONS = frozenset({'.pdf'})
+
+
+@lru_cache(maxsize=8)
+def _scan_directory(dir_path: str, dir_mtime_ns: int, extensions: frozenset) -> tuple:
+    """
+    List the names of files in dir_path with one of the given extensions. Cached on
+    the directory's own mtime, so the directory is only re-read after a file is added,
+    removed or renamed.
+    """
+    with os.scandir(dir_path) as it:
+        return tuple(
+            entry.name for entry in it
+            if entry.is_file() and os.path.splitext(entry.name)[1].lower() in extensions
+        )
+
+
+@lru_cache(maxsize=4096)
+def _iso_mtime(mtime: float) -> str:
+    """ISO timestamp for a file mtime, formatted once per distinct value"""
+    return datetime.fromtimestamp(mtime).isoformat()
+
+
+def _list_directory(directory: Path, extensions: frozenset) -> list:
+    """
+    List (name, size, ISO mtime) for matching files in directory, most recently
+    modified first; empty if it doesn't exist. Writing into an existing file doesn't
+    change the directory mtime, so sizes and mtimes are stat'ed on every call.
+    """
+    try:
+        dir_mtime_ns = directory.stat().st_mtime_ns
+    except FileNotFoundError:
+        return []
+    entries = []
+    for name in _scan_directory(str(directory), dir_mtime_ns, extensions):
+        try:
+            stat = os.stat(directory / name)
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, name, stat.st_size))
+    # Sort on the raw float timestamps
+    entries.sort(reverse=True)
+    return [(name, size, _iso_mtime(mtime)) for mtime, name, size in entries]
+
+
+def _has_financial_data(company_id: int) -> bool:
+    """Check on a pooled connection whether the company has any financial metrics"""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            # Stops at the first row; served by idx_financial_metrics_company_period
+            cur.execute("SELECT 1 FROM financial_metrics WHERE company_id = %s LIMIT 1", (company_id,))
+            return cur.fetchone() is not None
 
 @router.get("/reports")
 async def list_reports():
     """List all generated PDF reports"""
     try:
         reports = []
-        if REPORTS_DIR.exists():
-            for file_path in REPORTS_DIR.glob("*.pdf"):
-                stat = file_path.stat()
-                reports.append({
-                    "id": file_path.name,
-                    "filename": file_path.name,
-                    "url": f"/reports/{file_path.name}",
-                    "created": datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                    "size": stat.st_size
-                })
+        # Listing is already sorted by modification time (most recent first)
+        for name, size, created in _list_directory(REPORTS_DIR, REPORT_EXTENSIONS):
+            reports.append({
+                "id": name,
+                "filename": name,
+                "url": f"/reports/{name}",
+                "created": created,
+                "size": size
+            })
         
-        # Sort by creation time (most recent first)
-        reports.sort(key=lambda x: x["created"], reverse=True)
         return reports
         
     except Exception as e:
@@ -52,18 +106,14 @@ async def list_data_files():
     """List uploaded data files for debugging/testing"""
     try:
         files = []
-        data_dir = settings.project_root / "data"
-        for file_path in data_dir.glob("*"):
-            if file_path.suffix.lower() in ['.csv', '.xlsx', '.pdf']:
-                stat = file_path.stat()
-                files.append({
-                    "filename": file_path.name,
-                    "size": stat.st_size,
-                    "modified": datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                    "extension": file_path.suffix
-                })
+        for name, size, modified in _list_directory(DATA_DIR, ALLOWED_EXTENSIONS):
+            files.append({
+                "filename": name,
+                "size": size,
+                "modified": modified,
+                "extension": os.path.splitext(name)[1]
+            })
         
-        files.sort(key=lambda x: x["modified"], reverse=True)
         return files
         
     except Exception as e:
@@ -79,16 +129,11 @@ async def generate_financial_report(request: ReportRequest):
     
     try:
         # Verify company exists and has data
-        with get_db_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute("SELECT COUNT(*) FROM financial_metrics WHERE company_id = %s", (request.company_id,))
-                metric_count = cur.fetchone()[0]
-                
-                if metric_count == 0:
-                    raise HTTPException(
-                        status_code=404,
-                        detail=f"No financial data found for company_id {request.company_id}. Please upload data first."
-                    )
+        if not await asyncio.to_thread(_has_financial_data, request.company_id):
+            raise HTTPException(
+                status_code=404,
+                detail=f"No financial data found for company_id {request.company_id}. Please upload data first."
+            )
         
         # Generate unique report filename
         timestamp = int(datetime.now().timestamp() * 1000)
@@ -104,8 +149,8 @@ async def generate_financial_report(request: ReportRequest):
         
         # Generate report using integrated Python processing
         try:
-            # Use the processor's generate_report method
-            report_result = processor.generate_report(request.company_id, str(report_path))
+            # Use the processor's generate_report method, off the event loop since it blocks
+            report_result = await asyncio.to_thread(processor.generate_report, request.company_id, str(report_path))
             if not report_result.success:
                 raise Exception(f"Report generation failed: {report_result.message}")
             
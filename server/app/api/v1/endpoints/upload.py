@@ -4,6 +4,8 @@ Handles file uploads and processing through the financial data pipeline
 """
 
 import sys
+import asyncio
+import hashlib
 from pathlib import Path
 from datetime import datetime
 from typing import Optional, List
@@ -21,6 +23,10 @@ logger = setup_logger('financial-data-api')
 processor = FinancialDataProcessor()
 
 DATA_DIR = settings.project_root / "data"
+ALLOWED_EXTENSIONS = frozenset(ext.lower() for ext in settings.files.allowed_extensions)
+MAX_UPLOAD_SIZE = settings.files.max_size_bytes
+# Uploads are copied to disk in chunks of this size
+UPLOAD_CHUNK_SIZE = 1024 * 1024
 
 @router.post("/upload", response_model=UploadResponse)
 async def upload_file(
@@ -34,37 +40,47 @@ async def upload_file(
     """
     
     # Validate file type
-    allowed_extensions = {'.csv', '.xlsx', '.pdf'}
-    file_ext = Path(file.filename).suffix.lower()
+    upload_name = Path(file.filename)
+    file_ext = upload_name.suffix.lower()
     
-    if file_ext not in allowed_extensions:
+    if file_ext not in ALLOWED_EXTENSIONS:
         raise HTTPException(
             status_code=400,
-            detail=f"Invalid file type: {file_ext}. Allowed types: {', '.join(allowed_extensions)}"
+            detail=f"Invalid file type: {file_ext}. Allowed types: {', '.join(sorted(ALLOWED_EXTENSIONS))}"
         )
     
-    # Validate file size (10MB limit)
-    max_size = 10 * 1024 * 1024  # 10MB
-    file_content = await file.read()
-    if len(file_content) > max_size:
-        raise HTTPException(
-            status_code=400,
-            detail="File too large. Maximum size is 10MB."
-        )
+    # Generate unique filename
+    timestamp = int(datetime.now().timestamp() * 1000)
+    safe_filename = f"{timestamp}_{upload_name.name}"
+    file_path = DATA_DIR / safe_filename
     
+    file_size = 0
+    hasher = hashlib.blake2b(digest_size=16)
     try:
-        # Generate unique filename
-        timestamp = int(datetime.now().timestamp() * 1000)
-        safe_filename = f"{timestamp}_{Path(file.filename).name}"
-        file_path = DATA_DIR / safe_filename
-        
-        # Save file
-        with open(file_path, 'wb') as f:
-            f.write(file_content)
+        # Save file chunk by chunk, validating file size and hashing the content as it
+        # arrives, so an oversized upload is never held in memory in full or re-read
+        try:
+            with open(file_path, 'wb') as f:
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    file_size += len(chunk)
+                    if file_size > MAX_UPLOAD_SIZE:
+                        break
+                    hasher.update(chunk)
+                    f.write(chunk)
+            if file_size > MAX_UPLOAD_SIZE:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"File too large. Maximum size is {settings.files.max_size_mb}MB."
+                )
+        except BaseException:
+            # Never leave a partial upload behind in the data directory
+            file_path.unlink(missing_ok=True)
+            raise
         
         log_with_context(logger, 'info', 'File uploaded', 
             filename=file.filename,
-            size=len(file_content),
+            size=file_size,
+            content_hash=hasher.hexdigest(),
             path=str(file_path),
             company_id=company_id
         )
@@ -79,19 +95,20 @@ async def upload_file(
                 company_id=company_id
             )
             
-            ingest_result = processor.ingest_file(str(file_path), company_id)
+            # Pipeline steps are blocking DB/CPU work; run them off the event loop
+            ingest_result = await asyncio.to_thread(processor.ingest_file, str(file_path), company_id)
             if not ingest_result.success:
                 raise Exception(f"Ingestion failed: {ingest_result.message}")
             processing_steps.append("✓ Data ingested and persisted to database")
             
             # Step 2: Calculate Metrics
-            metrics_result = processor.calculate_metrics(company_id)
+            metrics_result = await asyncio.to_thread(processor.calculate_metrics, company_id)
             if not metrics_result.success:
                 raise Exception(f"Metrics calculation failed: {metrics_result.message}")
             processing_steps.append("✓ Financial metrics calculated")
             
             # Step 3: Generate Questions
-            questions_result = processor.generate_questions(company_id)
+            questions_result = await asyncio.to_thread(processor.generate_questions, company_id)
             if not questions_result.success:
                 raise Exception(f"Question generation failed: {questions_result.message}")
             processing_steps.append("✓ Analytical questions generated")
@@ -126,6 +143,8 @@ async def upload_file(
                 detail=f"File processing failed: {str(processing_error)}"
             )
             
+    except HTTPException:
+        raise
     except Exception as e:
         log_with_context(logger, 'error', 'Upload failed', 
             error=str(e),
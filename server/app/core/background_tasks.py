@@ -4,6 +4,7 @@ Handles heavy file processing operations asynchronously
 """
 
 import sys
+import asyncio
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, Any
@@ -34,19 +35,19 @@ async def process_file_async(file_path: str, company_id: int, filename: str) ->
         start_time = datetime.now()
         
         # Step 1: Data Ingestion
-        ingest_result = processor.ingest_file(file_path, company_id)
+        ingest_result = await asyncio.to_thread(processor.ingest_file, file_path, company_id)
         if not ingest_result.success:
             raise Exception(f"Ingestion failed: {ingest_result.message}")
         processing_steps.append("✓ Data ingested and persisted to database")
         
         # Step 2: Calculate Metrics
-        metrics_result = processor.calculate_metrics(company_id)
+        metrics_result = await asyncio.to_thread(processor.calculate_metrics, company_id)
         if not metrics_result.success:
             raise Exception(f"Metrics calculation failed: {metrics_result.message}")
         processing_steps.append("✓ Financial metrics calculated")
         
         # Step 3: Generate Questions
-        questions_result = processor.generate_questions(company_id)
+        questions_result = await asyncio.to_thread(processor.generate_questions, company_id)
         if not questions_result.success:
             raise Exception(f"Question generation failed: {questions_result.message}")
         processing_steps.append("✓ Analytical questions generated")
@@ -104,7 +105,7 @@ async def generate_report_async(company_id: int, report_path: str) -> Dict[str,
         start_time = datetime.now()
         
         # Generate report using processor
-        report_result = processor.generate_report(company_id, report_path)
+        report_result = await asyncio.to_thread(processor.generate_report, company_id, report_path)
         if not report_result.success:
             raise Exception(f"Report generation failed: {report_result.message}")
         
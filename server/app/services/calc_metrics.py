@@ -12,10 +12,11 @@ Features:
 """
 
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 import os
 import yaml
 import sys
+from bisect import bisect_right
 from datetime import datetime, timedelta, date
 from decimal import Decimal
 from pathlib import Path
@@ -31,6 +32,11 @@ except ImportError:
     sys.path.insert(0, str(project_root / 'server' / 'app' / 'utils'))
     from utils import get_db_connection, log_event
 
+# Rows fetched per round trip when streaming a company's metrics
+METRICS_ITERSIZE = 10000
+# derived_metrics.metric_value is DECIMAL(15,4): values must stay below 10^11 in magnitude
+MAX_METRIC_VALUE = 10 ** 11
+
 def load_observations():
     """Load observations from config/observations.yaml using absolute path"""
     obs_path = project_root / 'config' / 'observations.yaml'
@@ -45,6 +51,31 @@ def load_observations():
     })
     return observations
 
+def fits_metric_value(value):
+    """True if value can be stored in derived_metrics.metric_value without overflowing"""
+    return abs(round(value, 4)) < MAX_METRIC_VALUE
+
+def get_previous_periods(start_dates, quarterly_periods):
+    """
+    Resolve each start date's comparison period once, since it depends only on the
+    period and not on the line item or observation. Returns three dicts keyed by start date:
+    the previous month's start (MoM), the label of the latest quarter starting at least
+    90 days earlier (QoQ), and the same date a year earlier (YoY; none for 29 February).
+    quarterly_periods must be ordered by start_date.
+    """
+    quarterly_starts = [r['start_date'] for r in quarterly_periods]
+    prev_month_start, prev_quarter_label, prev_year_start = {}, {}, {}
+    for start_date in start_dates:
+        if start_date is None:
+            continue
+        prev_month_start[start_date] = (start_date.replace(day=1) - timedelta(days=1)).replace(day=1)
+        i = bisect_right(quarterly_starts, start_date - timedelta(days=90))
+        if i:
+            prev_quarter_label[start_date] = quarterly_periods[i - 1]['period_label']
+        if (start_date.month, start_date.day) != (2, 29):
+            prev_year_start[start_date] = start_date.replace(year=start_date.year - 1)
+    return prev_month_start, prev_quarter_label, prev_year_start
+
 def calculate_percentage(current, previous):
     if previous is None or previous == 0 or current is None:
         return None
@@ -61,54 +92,134 @@ def get_period_id(cur, period_label, period_type):
     res = cur.fetchone()
     return res[0] if res else None
 
-def get_financial_metrics(cur, company_id, line_item_id):
-    cur.execute(
-        """
-        SELECT p.period_label, p.id AS period_id, fm.value_type, fm.frequency,
-               fm.value, EXTRACT(YEAR FROM p.start_date) AS year, p.start_date, fm.id AS fm_id
-        FROM financial_metrics fm
-        JOIN periods p ON fm.period_id = p.id
-        WHERE fm.company_id = %s AND fm.line_item_id = %s
-        ORDER BY p.start_date
-        """, (company_id, line_item_id)
-    )
-    return cur.fetchall()
+def get_financial_metrics(cur, company_id):
+    """
+    Fetch all of a company's metrics in one query, grouped by line_item_id in start_date order.
+    Rows are streamed through a server-side cursor rather than buffered client-side first;
+    this needs the caller's connection to be inside a transaction.
+    """
+    metrics_by_line_item = {}
+    with cur.connection.cursor(name="calc_metrics_rows", cursor_factory=RealDictCursor) as rows_cur:
+        rows_cur.itersize = METRICS_ITERSIZE
+        rows_cur.execute(
+            """
+            SELECT fm.line_item_id, p.period_label, p.id AS period_id, p.period_type, fm.value_type,
+                   fm.value, p.start_date, fm.id AS fm_id
+            FROM financial_metrics fm
+            JOIN periods p ON fm.period_id = p.id
+            WHERE fm.company_id = %s
+            ORDER BY fm.line_item_id, p.start_date
+            """, (company_id,)
+        )
+        for row in rows_cur:
+            metrics_by_line_item.setdefault(row['line_item_id'], []).append(row)
+    return metrics_by_line_item
 
-def calculate_ytd(cur, company_id, year, line_item_id):
+def get_ytd_totals(cur, company_id):
+    """Sum monthly Actual values per (line_item_id, year) for a company in one query"""
     cur.execute(
         """
-        SELECT SUM(fm.value) AS total_value
+        SELECT fm.line_item_id, EXTRACT(YEAR FROM p.start_date)::int AS year, SUM(fm.value) AS total_value
         FROM financial_metrics fm
         JOIN periods p ON fm.period_id = p.id
-        WHERE fm.company_id = %s AND fm.line_item_id = %s AND fm.value_type = 'Actual'
+        WHERE fm.company_id = %s AND fm.value_type = 'Actual'
           AND p.period_type = 'Monthly'
-          AND EXTRACT(YEAR FROM p.start_date) = %s
+        GROUP BY fm.line_item_id, EXTRACT(YEAR FROM p.start_date)
         """,
-        (company_id, line_item_id, year)
+        (company_id,)
     )
-    res = cur.fetchone()
-    return float(res[0]) if res and res[0] is not None else None
+    return {
+        (row['line_item_id'], row['year']): float(row['total_value'])
+        for row in cur if row['total_value'] is not None
+    }
+
+def get_or_create_ytd_period(cur, year, period_cache):
+    """
+    Return the id of the 'YTD <year>' Yearly period, creating it if needed.
+    Ids are memoised in period_cache. Existing rows are read without locking, since the
+    row is shared by every company's run and the caller's transaction stays open until the end.
+    """
+    ytd_label = f"YTD {year}"
+    period_id = period_cache.get(ytd_label)
+    if period_id is None:
+        select_sql = "SELECT id FROM periods WHERE period_label = %s AND period_type = 'Yearly'"
+        cur.execute(select_sql, (ytd_label,))
+        row = cur.fetchone()
+        if row is None:
+            # Savepoint so a failure here doesn't abort the caller's transaction
+            cur.execute("SAVEPOINT ytd_period")
+            try:
+                cur.execute(
+                    """
+                    INSERT INTO periods (period_label, period_type, start_date, end_date, created_at, updated_at)
+                    VALUES (%s, 'Yearly', %s, %s, NOW(), NOW())
+                    ON CONFLICT (period_label, period_type) DO NOTHING
+                    RETURNING id
+                    """, (ytd_label, date(year, 1, 1), date(year, 12, 31))
+                )
+                row = cur.fetchone()
+                if row is None:
+                    # Another run inserted it concurrently
+                    cur.execute(select_sql, (ytd_label,))
+                    row = cur.fetchone()
+            except Exception:
+                cur.execute("ROLLBACK TO SAVEPOINT ytd_period")
+                raise
+            cur.execute("RELEASE SAVEPOINT ytd_period")
+        period_id = row['id']
+        period_cache[ytd_label] = period_id
+    return period_id
+
+# source_ids is always the base metric alone, so it is built server-side
+UPSERT_DERIVED_METRICS_SQL = """
+    INSERT INTO derived_metrics (
+        base_metric_id, calculation_type, company_id, period_id,
+        metric_value, unit, source_ids, calculation_note,
+        corroboration_status, frequency, created_at, updated_at
+    )
+    SELECT v.base_metric_id, v.calculation_type, v.company_id, v.period_id,
+           v.metric_value, v.unit, ARRAY[v.base_metric_id::text], v.calculation_note,
+           v.corroboration_status, v.frequency, NOW(), NOW()
+    FROM (VALUES %s) AS v (
+        base_metric_id, calculation_type, company_id, period_id,
+        metric_value, unit, calculation_note, corroboration_status, frequency
+    )
+    ON CONFLICT (base_metric_id, company_id, period_id, calculation_type) DO UPDATE SET
+        metric_value = EXCLUDED.metric_value,
+        updated_at = EXCLUDED.updated_at
+"""
 
-def insert_or_update_derived_metric(cur, base_metric_id, calculation_type, company_id, period_id,
-                                   metric_value, unit, source_ids, calculation_note,
-                                   corroboration_status, frequency):
+def get_derived_metric_values(cur, company_id):
+    """Map (base_metric_id, period_id, calculation_type) to the stored value for a company's derived metrics"""
     cur.execute(
         """
-        INSERT INTO derived_metrics (
-            base_metric_id, calculation_type, company_id, period_id,
-            metric_value, unit, source_ids, calculation_note,
-            corroboration_status, frequency, created_at, updated_at
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW(), NOW())
-        ON CONFLICT (base_metric_id, company_id, period_id, calculation_type) DO UPDATE SET
-            metric_value = EXCLUDED.metric_value,
-            updated_at = EXCLUDED.updated_at
-        """,
-        (
-            base_metric_id, calculation_type, company_id, period_id,
-            metric_value, unit, source_ids, calculation_note,
-            corroboration_status, frequency
-        )
+        SELECT base_metric_id, period_id, calculation_type, metric_value
+        FROM derived_metrics
+        WHERE company_id = %s AND metric_value IS NOT NULL
+        """, (company_id,)
     )
+    return {
+        (row['base_metric_id'], row['period_id'], row['calculation_type']): float(row['metric_value'])
+        for row in cur
+    }
+
+def upsert_derived_metrics(cur, rows, existing_values=None, page_size=1000):
+    """
+    Write buffered derived metric rows with one multi-row INSERT per page.
+    Each row is (base_metric_id, calculation_type, company_id, period_id, metric_value,
+    unit, calculation_note, corroboration_status, frequency).
+    Rows whose value matches existing_values (at the column's 4 decimal places) are skipped.
+    Returns the number of rows written.
+    """
+    if existing_values:
+        rows = [
+            r for r in rows
+            if existing_values.get((r[0], r[3], r[1])) != round(r[4], 4)
+        ]
+    if not rows:
+        return 0
+    execute_values(cur, UPSERT_DERIVED_METRICS_SQL, rows, page_size=page_size)
+    return len(rows)
 
 def main():
     if len(sys.argv) < 2:
@@ -125,22 +236,45 @@ def main():
         return
 
     total_processed = 0
+    total_unchanged = 0
     with get_db_connection() as conn:
+        # Run the whole calculation as one transaction. Derived metrics can always be
+        # recomputed from financial_metrics, so the commit needn't wait for the WAL flush.
+        conn.autocommit = False
         with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute("SET LOCAL synchronous_commit = off")
+
             # Preload line items
             cur.execute("SELECT id, name FROM line_item_definitions")
             line_items_map = {row['name']: row['id'] for row in cur.fetchall()}
             if not line_items_map:
                 raise Exception("No line items found. Ensure database seeded properly.")
 
+            # Preload quarterly periods for QoQ previous-quarter lookups
+            cur.execute("SELECT period_label, start_date FROM periods WHERE period_type = 'Quarterly' ORDER BY start_date")
+            quarterly_periods = cur.fetchall()
+            # YTD period ids by label, shared across observations and line items
+            ytd_period_ids = {}
+            # Every observation works off the same metrics, so fetch them once
+            metrics_by_line_item = get_financial_metrics(cur, company_id)
+            prev_month_start, prev_quarter_label, prev_year_start = get_previous_periods(
+                {m['start_date'] for rows in metrics_by_line_item.values() for m in rows},
+                quarterly_periods
+            )
+            ytd_totals = get_ytd_totals(cur, company_id)
+            # Stored derived values, so unchanged results aren't rewritten
+            existing_values = get_derived_metric_values(cur, company_id)
+
             for obs in observations:
                 calc_type = obs.get('calculation_type')
                 period_type = obs.get('frequency') or "Monthly"
                 materiality = obs.get('materiality') or 0.05
+                # Derived rows for this observation, written in one batch after the line-item loop
+                derived_rows = []
 
                 for name, li_id in line_items_map.items():
                     try:
-                        metrics = get_financial_metrics(cur, company_id, li_id)
+                        metrics = metrics_by_line_item.get(li_id)
                         if not metrics:
                             continue
 
@@ -148,105 +282,81 @@ def main():
                         index = {(m['period_label'], m['value_type']): m for m in metrics}
                         # Growth calculations
                         if calc_type in ["MoM Growth", "QoQ Growth", "YoY Growth"]:
+                            # Actual rows by (start_date, period_type), so previous-period
+                            # lookups don't need a query per row
+                            actual_by_start = {
+                                (m['start_date'], m['period_type']): m
+                                for m in metrics
+                                if m['value_type'] == "Actual" and m['start_date'] is not None
+                            }
                             for (pl, vt), rec in index.items():
                                 if vt != "Actual" or rec['value'] is None:
                                     continue
-                                prev_label = None
                                 start_date = rec['start_date']
-                                # Determine prev_label
+                                # Determine the previous period's Actual row
                                 if calc_type == "MoM Growth":
-                                    prev_start = (start_date.replace(day=1) - timedelta(days=1)).replace(day=1)
-                                    cur.execute(
-                                        "SELECT period_label FROM periods WHERE start_date = %s AND period_type = 'Monthly'",
-                                        (prev_start,)
-                                    )
-                                    r = cur.fetchone()
-                                    prev_label = r['period_label'] if r else None
+                                    prev = actual_by_start.get((prev_month_start.get(start_date), "Monthly"))
                                 elif calc_type == "QoQ Growth":
-                                    prev_start = start_date - timedelta(days=90)
-                                    cur.execute(
-                                        """
-                                        SELECT period_label FROM periods
-                                        WHERE period_type = 'Quarterly' AND start_date <= %s
-                                        ORDER BY start_date DESC LIMIT 1
-                                        """, (prev_start,)
-                                    )
-                                    r = cur.fetchone()
-                                    prev_label = r['period_label'] if r else None
+                                    prev = index.get((prev_quarter_label.get(start_date), "Actual"))
                                 else:  # YoY Growth
-                                    prev_start = date(start_date.year - 1, start_date.month, start_date.day)
-                                    cur.execute(
-                                        "SELECT period_label FROM periods WHERE start_date = %s AND period_type = %s",
-                                        (prev_start, period_type)
-                                    )
-                                    r = cur.fetchone()
-                                    prev_label = r['period_label'] if r else None
-
-                                if not prev_label:
-                                    continue
-                                prev = index.get((prev_label, "Actual"))
+                                    prev = actual_by_start.get((prev_year_start.get(start_date), period_type))
+
                                 if not prev or prev['value'] is None:
                                     continue
+                                prev_label = prev['period_label']
 
                                 pct = calculate_percentage(rec['value'], prev['value'])
                                 if pct is None or abs(pct) < materiality * 100:
                                     continue
-                                insert_or_update_derived_metric(
-                                    cur, rec['fm_id'], calc_type, company_id,
-                                    rec['period_id'], pct, "%", [rec['fm_id']],
+                                if not fits_metric_value(pct):
+                                    log_event("calc_metrics_value_out_of_range", {
+                                        "company_id": company_id,
+                                        "line_item": name,
+                                        "calculation_type": calc_type,
+                                        "period_label": pl,
+                                        "value": pct
+                                    })
+                                    continue
+                                derived_rows.append((
+                                    rec['fm_id'], calc_type, company_id,
+                                    rec['period_id'], pct, "%",
                                     f"{calc_type} for {pl} vs {prev_label}",
                                     "Ok", period_type
-                                )
-                                total_processed += 1
+                                ))
 
                         # YTD Growth
                         elif calc_type == "YTD Growth":
-                            years = {m['year'] for m in metrics if m['year'] is not None}
-                            for yr in years:
-                                ytd = calculate_ytd(cur, company_id, int(yr), li_id)
-                                prev_ytd = calculate_ytd(cur, company_id, int(yr) - 1, li_id)
+                            # Rows are in start_date order, so the first row seen for a year
+                            # is that year's base metric
+                            base_metric_by_year = {}
+                            for m in metrics:
+                                if m['start_date'] is not None:
+                                    base_metric_by_year.setdefault(m['start_date'].year, m['fm_id'])
+                            for yr, base_metric_id in base_metric_by_year.items():
+                                ytd = ytd_totals.get((li_id, yr))
+                                prev_ytd = ytd_totals.get((li_id, yr - 1))
                                 if ytd is None or prev_ytd is None or prev_ytd == 0:
                                     continue
                                 pct = calculate_percentage(ytd, prev_ytd)
                                 if pct is None or abs(pct) < materiality * 100:
                                     continue
-                                # YTD period id
-                                ytd_label = f"YTD {yr}"
-                                cur.execute(
-                                    "SELECT id FROM periods WHERE period_label = %s AND period_type = 'Yearly'",
-                                    (ytd_label,)
-                                )
-                                r = cur.fetchone()
-                                ytd_id = r['id'] if r else None
-                                if not ytd_id:
-                                    # Create
-                                    cur.execute(
-                                        """
-                                        INSERT INTO periods (period_label, period_type, start_date, end_date, created_at, updated_at)
-                                        VALUES (%s, 'Yearly', %s, %s, NOW(), NOW()) RETURNING id
-                                        """, (ytd_label, date(int(yr),1,1), date(int(yr),12,31))
-                                    )
-                                    ytd_id = cur.fetchone()['id']
-                                # Base metric selection
-                                cur.execute(
-                                    """
-                                    SELECT fm.id FROM financial_metrics fm
-                                    JOIN periods p ON fm.period_id = p.id
-                                    WHERE fm.company_id = %s AND fm.line_item_id = %s
-                                      AND EXTRACT(YEAR FROM p.start_date) = %s
-                                    ORDER BY p.start_date LIMIT 1
-                                    """, (company_id, li_id, yr)
-                                )
-                                bm = cur.fetchone()
-                                if not bm:
+                                if not fits_metric_value(pct):
+                                    log_event("calc_metrics_value_out_of_range", {
+                                        "company_id": company_id,
+                                        "line_item": name,
+                                        "calculation_type": calc_type,
+                                        "year": yr,
+                                        "value": pct
+                                    })
                                     continue
-                                insert_or_update_derived_metric(
-                                    cur, bm['id'], calc_type, company_id,
-                                    ytd_id, pct, "%", [bm['id']],
+                                # YTD period id
+                                ytd_id = get_or_create_ytd_period(cur, yr, ytd_period_ids)
+                                derived_rows.append((
+                                    base_metric_id, calc_type, company_id,
+                                    ytd_id, pct, "%",
                                     f"{calc_type} for year {yr} vs {yr-1}",
                                     "Ok", "Yearly"
-                                )
-                                total_processed += 1
+                                ))
 
                     except Exception as e:
                         log_event("calc_metrics_error", {
@@ -257,14 +367,33 @@ def main():
                         })
                         continue
 
+                # The run is one transaction; a savepoint keeps a failed batch from
+                # aborting it and losing every other observation's results
+                cur.execute("SAVEPOINT derived_batch")
+                try:
+                    written = upsert_derived_metrics(cur, derived_rows, existing_values)
+                except Exception as e:
+                    cur.execute("ROLLBACK TO SAVEPOINT derived_batch")
+                    log_event("calc_metrics_error", {
+                        "company_id": company_id,
+                        "error": str(e),
+                        "observation": obs.get('id')
+                    })
+                else:
+                    cur.execute("RELEASE SAVEPOINT derived_batch")
+                    total_processed += written
+                    total_unchanged += len(derived_rows) - written
+
             conn.commit()
 
     log_event("calc_metrics_completed", {
         "company_id": company_id,
         "total_derived_metrics": total_processed,
+        "unchanged_derived_metrics": total_unchanged,
         "timestamp": datetime.now().isoformat()
     })
-    print(f"✅ Calculated {total_processed} derived metrics for company_id={company_id}")
+    print(f"✅ Calculated {total_processed + total_unchanged} derived metrics "
+          f"({total_unchanged} unchanged) for company_id={company_id}")
 
 if __name__ == "__main__":
     main()
@@ -2,9 +2,8 @@
 # Enhanced with YAML-driven line item and header mapping
 
 import os
-import yaml
 import re
-from app.utils.utils import log_event
+from app.utils.utils import log_event, load_yaml_cached
 
 CONFIG_DIR = os.path.join(os.path.dirname(__file__), os.pardir, "config")
 FIELDS_YAML = os.path.join(CONFIG_DIR, "fields.yaml")
@@ -14,8 +13,7 @@ TAXONOMY_YAML = os.path.join(CONFIG_DIR, "taxonomy.yaml")
 def load_yaml(path):
     """Load YAML file, logging on error."""
     try:
-        with open(path, "r") as f:
-            return yaml.safe_load(f)
+        return load_yaml_cached(path)
     except Exception as e:
         log_event("yaml_load_error", {"file": path, "error": str(e)})
         return {}
@@ -62,9 +60,22 @@ def load_taxonomy_patterns() -> list:
     return patterns
 
 
+def load_field_synonyms() -> dict:
+    """
+    Build mapping of every lowercase header synonym to its field name from fields.yaml.
+    The first field listing a synonym wins.
+    """
+    synonyms = {}
+    for field_name, meta in load_yaml(FIELDS_YAML).get("fields", {}).items():
+        for s in meta.get("synonyms", []):
+            synonyms.setdefault(s.lower(), field_name)
+    return synonyms
+
+
 # Load once for performance
 LINE_ITEM_MAP = load_line_item_mappings()
 TAXONOMY_PATTERNS = load_taxonomy_patterns()
+FIELD_SYNONYMS = load_field_synonyms()
 
 
 def map_and_filter_row(raw_row: dict) -> dict:
@@ -100,14 +111,8 @@ def map_and_filter_row(raw_row: dict) -> dict:
     # Optionally map unknown headers (e.g. period_type) via taxonomy
     mapped_fields = {}
     for k, v in raw_row.items():
-        kl = k.lower().strip()
-        mapped_key = None
         # exact synonyms from fields.yaml
-        from_fields = load_yaml(FIELDS_YAML).get("fields", {})
-        for field_name, meta in from_fields.items():
-            if kl in [s.lower() for s in meta.get("synonyms", [])]:
-                mapped_key = field_name
-                break
+        mapped_key = FIELD_SYNONYMS.get(k.lower().strip())
         # fallback via taxonomy regex
         if not mapped_key:
             for tax, rx in TAXONOMY_PATTERNS:
@@ -139,9 +144,10 @@ def get_available_line_items() -> list:
 
 def reload_mappings():
     """Reload mappings from YAML (for tests or dynamic config)."""
-    global LINE_ITEM_MAP, TAXONOMY_PATTERNS
+    global LINE_ITEM_MAP, TAXONOMY_PATTERNS, FIELD_SYNONYMS
     LINE_ITEM_MAP = load_line_item_mappings()
     TAXONOMY_PATTERNS = load_taxonomy_patterns()
+    FIELD_SYNONYMS = load_field_synonyms()
     return LINE_ITEM_MAP
 
 
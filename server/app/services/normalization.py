@@ -23,6 +23,13 @@ if PERIODS_CFG.get("validation", {}).get("strict_alias_uniqueness"):
                 raise ValueError(f"Alias '{alias}' in '{canon}' also in '{seen[key]}'")
             seen[key] = canon
 
+# Lowercased alias -> (canonical label, period type); first definition wins,
+# as when scanning period_aliases in order
+ALIAS_INDEX = {}
+for _canon, _cfg in PERIODS_CFG["period_aliases"].items():
+    for _alias in _cfg["aliases"]:
+        ALIAS_INDEX.setdefault(_alias.lower(), (_canon, _cfg["period_type"]))
+
 def clean_period_string(raw: Any) -> str:
     s = str(raw).strip()
     s = re.sub(r"\s+", " ", s)
@@ -34,10 +41,10 @@ def normalize_period_label(raw: Any) -> Tuple[Optional[str], Optional[str]]:
         return None, None
     cleaned = clean_period_string(raw)
     low = cleaned.lower()
-    for canon, cfg in PERIODS_CFG["period_aliases"].items():
-        if any(low == a.lower() for a in cfg["aliases"]):
-            log_event("normalize_alias", {"raw": cleaned, "canonical": canon})
-            return canon, cfg["period_type"]
+    alias_hit = ALIAS_INDEX.get(low)
+    if alias_hit:
+        log_event("normalize_alias", {"raw": cleaned, "canonical": alias_hit[0]})
+        return alias_hit
     for section, pats in PERIODS_CFG.get("parsing", {}).get("patterns", {}).items():
         for pat in pats:
             log_event("normalize_pattern_check", {"raw": cleaned, "pattern": pat, "section": section})
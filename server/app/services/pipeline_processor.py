@@ -41,6 +41,8 @@ logger = setup_logger('pipeline-processor')
 
 class PipelineResult:
     """Result object for pipeline operations"""
+    __slots__ = ('success', 'message', 'data', 'errors')
+
     def __init__(self, success: bool = True, message: str = "", data: Any = None, errors: list = None):
         self.success = success
         self.message = message
@@ -264,29 +266,14 @@ class FinancialDataProcessor:
         """
         Generate PDF report for a company
         Replaces: runPythonScript('report_generator.py', [company_id, output_path])
+        Runs in-process so each report reuses a pooled DB connection instead of
+        starting an interpreter and opening a fresh connection per report.
         """
         try:
             self.logger.info(f"Generating report for company {company_id}")
             
-            if hasattr(report_generator, 'main'):
-                result = report_generator.main(company_id, output_path)
-                return PipelineResult(True, f"Report generated: {output_path}", data={"output_path": output_path})
-            else:
-                # Fallback to subprocess
-                import subprocess
-                # Get project root directory  
-                project_root = current_dir.parent.parent.parent
-                result = subprocess.run([
-                    sys.executable,
-                    str(current_dir / 'report_generator.py'),
-                    str(company_id),
-                    output_path
-                ], capture_output=True, text=True, cwd=str(project_root))
-                
-                if result.returncode == 0:
-                    return PipelineResult(True, f"Report generated: {output_path}", data={"output_path": output_path})
-                else:
-                    return PipelineResult(False, "Report generation failed", errors=[result.stderr])
+            report_generator.generate_report(company_id, output_path)
+            return PipelineResult(True, f"Report generated: {output_path}", data={"output_path": output_path})
                     
         except Exception as e:
             error_msg = f"Report generation failed: {str(e)}"
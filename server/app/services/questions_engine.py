@@ -32,6 +32,17 @@ except ImportError:
     from utils import get_db_connection, log_event
 
 
+# Helper functions exposed to every question template
+TEMPLATE_HELPERS = {
+    'abs': abs,  # Add abs function
+    'percent': lambda current, prior: round((current - prior) / prior * 100, 2) if prior and prior != 0 else 0,
+    'format_currency': lambda value: f"${value:,.2f}" if value else "$0.00",
+    'format_abs': lambda value: f"${abs(value):,.2f}" if value else "$0.00",
+    'round_smart': lambda value, decimals: round(value, decimals) if value else 0,
+    'conditional': lambda condition, true_text, false_text: true_text if condition else false_text,
+}
+
+
 class QuestionsEngine:
     """
     Generates contextual financial questions based on observations and templates.
@@ -50,6 +61,8 @@ class QuestionsEngine:
         self.questions = []
         self.generated_questions = []
         self.project_root = project_root
+        # Compiled Jinja2 templates keyed by template text
+        self._compiled_templates = {}
         
         # Load YAML configuration files
         self._load_observations()
@@ -113,15 +126,16 @@ class QuestionsEngine:
                 'company_id': self.company_id
             })
             
-            results = cur.fetchall()
             columns = [desc[0] for desc in cur.description]
+            observation_id = observation['id']
+            observation_name = observation['name']
             
-            # Convert to list of dictionaries
+            # Convert to list of dictionaries straight off the cursor
             observation_data = []
-            for row in results:
+            for row in cur:
                 row_dict = dict(zip(columns, row))
-                row_dict['observation_id'] = observation['id']
-                row_dict['observation_name'] = observation['name']
+                row_dict['observation_id'] = observation_id
+                row_dict['observation_name'] = observation_name
                 row_dict['threshold'] = threshold
                 observation_data.append(row_dict)
             
@@ -156,22 +170,14 @@ class QuestionsEngine:
             if not template_text:
                 return None
             
-            # Create Jinja2 template
-            template = Template(template_text)
+            # Compile each Jinja2 template once; it is rendered for every matching observation row
+            template = self._compiled_templates.get(template_text)
+            if template is None:
+                template = Template(template_text)
+                self._compiled_templates[template_text] = template
             
-            # Prepare context with helper functions
-            context = {
-                # Financial data from observation
-                **observation_data,
-                
-                # Helper functions for formatting
-                'abs': abs,  # Add abs function
-                'percent': lambda current, prior: round((current - prior) / prior * 100, 2) if prior and prior != 0 else 0,
-                'format_currency': lambda value: f"${value:,.2f}" if value else "$0.00",
-                'format_abs': lambda value: f"${abs(value):,.2f}" if value else "$0.00",
-                'round_smart': lambda value, decimals: round(value, decimals) if value else 0,
-                'conditional': lambda condition, true_text, false_text: true_text if condition else false_text,
-            }
+            # Prepare context: financial data from observation plus helper functions for formatting
+            context = {**observation_data, **TEMPLATE_HELPERS}
             
             # Add specific context based on observation data
             if 'calculated_value' in observation_data:
@@ -1,11 +1,12 @@
 import os
 import sys
 import json
-import datetime
 import logging
+import logging.handlers
 import psycopg2
 from pathlib import Path
 from fpdf import FPDF
+from fpdf.enums import XPos, YPos
 
 # Add proper path for imports
 project_root = Path(__file__).resolve().parent.parent.parent.parent
@@ -27,7 +28,8 @@ def setup_logging():
         datefmt="%Y-%m-%d %H:%M:%S",
         handlers=[
             logging.StreamHandler(sys.stdout),
-            logging.FileHandler("report_generator.log")
+            # Rotate so long-running batch jobs don't grow the log without bound
+            logging.handlers.RotatingFileHandler("report_generator.log", maxBytes=10 * 1024 * 1024, backupCount=5)
         ]
     )
     return logging.getLogger(__name__)
@@ -36,6 +38,48 @@ def setup_logging():
 logger = setup_logging()
 
 
+# Metrics and questions share one result set: columns are padded to the same
+# shape and tagged in the last column ('m' / 'q') so the caller can split them.
+# Questions keep their own ORDER BY/LIMIT inside the subquery; the outer sort
+# puts metrics first by period start then name, questions newest first.
+_METRICS_SELECT = """
+    SELECT lid.name, p.period_label, fm.value_type, fm.value, fm.currency,
+           fm.source_file, fm.source_page, fm.notes, NULL::integer AS priority,
+           EXTRACT(EPOCH FROM p.start_date) AS sort_key, 'm' AS kind
+      FROM financial_metrics fm
+      JOIN line_item_definitions lid ON fm.line_item_id = lid.id
+      JOIN periods p ON fm.period_id = p.id
+     WHERE fm.company_id = %(company_id)s
+"""
+
+_QUESTIONS_SELECT = """
+    SELECT * FROM (
+        SELECT q.question_text, q.category, NULL::text, NULL::numeric, NULL::text,
+               NULL::text, NULL::integer, NULL::text, q.priority,
+               -EXTRACT(EPOCH FROM q.created_at), 'q'
+          FROM questions q
+         WHERE q.company_id = %(company_id)s
+         ORDER BY q.created_at DESC
+         LIMIT 10
+    ) latest_questions
+"""
+
+_ROWS_ORDER = " ORDER BY kind, sort_key, 1"
+
+REPORT_ROWS_SQL = _METRICS_SELECT + " UNION ALL " + _QUESTIONS_SELECT + _ROWS_ORDER
+# Used when the combined query fails (e.g. questions table not migrated yet)
+METRICS_ROWS_SQL = _METRICS_SELECT + _ROWS_ORDER
+
+# created_at is stamped by the database so it matches the server clock
+INSERT_REPORT_SQL = (
+    "INSERT INTO generated_reports (company_id, report_type, file_path, created_at) "
+    "VALUES (%s, %s, %s, NOW())"
+)
+
+# Question priority (1/3/5) to the label shown in the report
+PRIORITY_LABELS = {1: "Low", 3: "Medium", 5: "High"}
+
+
 class Report(FPDF):
     def __init__(self, company_id):
         super().__init__(orientation='L', unit='mm', format='A4')  # Landscape orientation
@@ -43,11 +87,12 @@ class Report(FPDF):
         self.set_auto_page_break(auto=True, margin=15)
         # Register corporate font if provided
         font_path = os.getenv('FONT_PATH')
-        if font_path and os.path.isfile(font_path):
-            self.add_font('Corporate', '', font_path, uni=True)
+        self.unicode_font = bool(font_path and os.path.isfile(font_path))
+        if self.unicode_font:
+            self.add_font('Corporate', '', font_path)
             self.set_font('Corporate', '', 10)  # Smaller font for landscape
         else:
-            self.set_font('Arial', '', 10)  # Smaller font for landscape
+            self.set_font('helvetica', '', 10)  # Smaller font for landscape
 
 
     def header(self):
@@ -55,15 +100,24 @@ class Report(FPDF):
         if self.page_no() == 1:
             self.set_font_size(18)
             self.set_text_color(0, 51, 102)
-            self.cell(0, 10, f"Financial Report - Company ID: {self.company_id}", ln=True, align='C')
+            self.cell(0, 10, f"Financial Report - Company ID: {self.company_id}",
+                      new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='C')
             self.ln(5)
             self.set_text_color(0, 0, 0)
 
 
+    def _safe_text(self, text):
+        """Replace characters the core (latin-1) fonts can't draw with '?'"""
+        if self.unicode_font or text.isascii():
+            return text
+        return text.encode('latin-1', 'replace').decode('latin-1')
+
+
     def add_table_with_wrap(self, data, headers, col_widths, max_chars_per_col=None):
         """Add table with text wrapping support - fixed pagination"""
         if max_chars_per_col is None:
             max_chars_per_col = [15] * len(headers)  # Default char limits
+        max_chars_per_col = tuple(max_chars_per_col)
         
         # Header row
         self.set_fill_color(0, 51, 102)
@@ -72,43 +126,49 @@ class Report(FPDF):
         
         header_height = 6
         for header, w in zip(headers, col_widths):
-            self.cell(w, header_height, header, border=1, fill=True, align='C')
+            self.cell(w, header_height, self._safe_text(header), border=1, fill=True, align='C')
         self.ln()
         
         # Data rows with text wrapping
         self.set_text_color(0, 0, 0)
         self.set_font(style='', size=7)
+        # Only the striped row background uses the fill colour, so set it once
+        self.set_fill_color(245, 245, 245)
         fill = False
+
+        # Bind the per-cell drawing calls once for the row loop
+        cell, rect, set_xy = self.cell, self.rect, self.set_xy
+        safe = self._safe_text
+
+        # Column x offsets from the table's left edge, computed once per table
+        x_offsets = [0]
+        for w in col_widths:
+            x_offsets.append(x_offsets[-1] + w)
+        total_w = x_offsets[-1]
+
+        # Rows are paginated by hand, so auto page break stays off for the whole
+        # table; the page bottom is taken before that clears the bottom margin
+        page_bottom = self.h - self.b_margin
+        self.set_auto_page_break(False)
+        x_start = self.get_x()
+        y_start = self.get_y()
         
         for row in data:
             # Check if we need a page break for this row
             estimated_row_height = 8  # Conservative estimate
-            if self.get_y() + estimated_row_height > self.h - self.b_margin:
+            if y_start + estimated_row_height > page_bottom:
                 self.add_page()
+                y_start = self.get_y()
             
             # Prepare row data with text wrapping
             wrapped_row = []
             max_lines = 1
             
             for item, max_chars in zip(row, max_chars_per_col):
-                text = str(item) if item is not None else ''
+                text = safe(str(item)) if item is not None else ''
                 
                 if len(text) > max_chars:
-                    # Simple word wrapping
-                    words = text.split(' ')
-                    lines = []
-                    current_line = ''
-                    
-                    for word in words:
-                        if len(current_line + ' ' + word) <= max_chars:
-                            current_line += (' ' + word if current_line else word)
-                        else:
-                            if current_line:
-                                lines.append(current_line)
-                            current_line = word
-                    if current_line:
-                        lines.append(current_line)
-                    
+                    lines = _wrap_text(text, max_chars)
                     wrapped_row.append(lines)
                     max_lines = max(max_lines, len(lines))
                 else:
@@ -117,139 +177,145 @@ class Report(FPDF):
             # Calculate actual row height
             row_height = max_lines * 4 + 2
             
-            # Disable auto page break temporarily to draw complete row
-            self.set_auto_page_break(False)
-            
             # Draw row background if needed
             if fill:
-                self.set_fill_color(245, 245, 245)
-                self.rect(self.get_x(), self.get_y(), sum(col_widths), row_height, 'F')
+                rect(x_start, y_start, total_w, row_height, 'F')
             
             # Draw each cell in the row
-            y_start = self.get_y()
-            x_start = self.get_x()
-            
             for col_idx, (cell_lines, w) in enumerate(zip(wrapped_row, col_widths)):
-                x_pos = x_start + sum(col_widths[:col_idx])
+                x_pos = x_start + x_offsets[col_idx]
                 
                 # Draw cell border
-                self.rect(x_pos, y_start, w, row_height, 'D')
+                rect(x_pos, y_start, w, row_height, 'D')
                 
-                # Draw text lines in cell
+                # Draw text lines in cell; truncate lines that are still too long
+                # (single words wider than the column)
+                limit = max_chars_per_col[col_idx]
                 for line_idx, line in enumerate(cell_lines):
-                    if line.strip():  # Only draw non-empty lines
-                        self.set_xy(x_pos + 1, y_start + 1 + line_idx * 4)
-                        # Truncate if still too long
-                        if len(line) > max_chars_per_col[col_idx]:
-                            line = line[:max_chars_per_col[col_idx]-3] + '...'
-                        self.cell(w - 2, 4, line, border=0, align='L')
+                    if line:  # Only draw non-empty lines
+                        set_xy(x_pos + 1, y_start + 1 + line_idx * 4)
+                        cell(w - 2, 4, _truncate(line, limit, limit - 3), border=0, align='L')
             
             # Move to next row
-            self.set_xy(x_start, y_start + row_height)
-            
-            # Re-enable auto page break
-            self.set_auto_page_break(True, margin=15)
+            y_start += row_height
+            set_xy(x_start, y_start)
             
             fill = not fill
-        
+
+        # Re-enable auto page break
+        self.set_auto_page_break(True, margin=15)
         self.ln(5)
 
 
-def generate_report(company_id: int, output_path: str):
-    logger.info(f"Starting report generation for company_id={company_id}")
+def _wrap_text(text, max_chars):
+    """Greedy word wrap into lines of at most max_chars (long words get their own line)"""
+    lines = []
+    current = []
+    current_len = 0
+    for word in text.split():
+        # Same fit rule as before: the word plus a separating space must fit
+        if current_len + 1 + len(word) <= max_chars:
+            current_len = current_len + 1 + len(word) if current else len(word)
+            current.append(word)
+        else:
+            if current:
+                lines.append(' '.join(current))
+            current = [word]
+            current_len = len(word)
+    if current:
+        lines.append(' '.join(current))
+    return lines
+
+
+def _truncate(text, max_len, keep=None):
+    """Cut text longer than max_len down to `keep` characters plus an ellipsis"""
+    if len(text) <= max_len:
+        return text
+    return text[:max_len if keep is None else keep] + '...'
+
+
+def _clean_metric_row(row):
+    """Return a metrics row with the source filename shortened for display"""
+    source = row[5]
+    if source:
+        filename = str(source)
+        if '.' in filename:
+            source = _truncate(filename.partition('.')[0], 18, 15)
+    return row[:5] + (source,) + row[6:8]
+
+
+def _fetch_report_rows(conn, sql, company_id):
+    """Fetch the tagged report rows for one company"""
+    with conn.cursor() as cur:
+        cur.execute(sql, {'company_id': company_id})
+        return cur.fetchall()
+
+
+def _render_report(conn, company_id, output_path):
+    """Fetch the report rows for one company and write its PDF to output_path"""
+    # Fetch metrics and the latest questions in one round trip
     try:
-        with get_db_connection() as conn:
-            cur = conn.cursor()
-            # Fetch metrics
-            cur.execute(
-                """
-                SELECT lid.name, p.period_label, fm.value_type, fm.value, fm.currency,
-                       fm.source_file, fm.source_page, fm.notes
-                  FROM financial_metrics fm
-                  JOIN line_item_definitions lid ON fm.line_item_id = lid.id
-                  JOIN periods p ON fm.period_id = p.id
-                 WHERE fm.company_id = %s
-                 ORDER BY p.start_date, lid.name
-                """, (company_id,)
-            )
-            metrics = cur.fetchall()
-            # Fetch questions - simplified query that works with current schema
-            try:
-                cur.execute(
-                    """
-                    SELECT q.id, q.company_id, q.created_at, q.question_text, q.category, q.priority
-                      FROM questions q
-                     WHERE q.company_id = %s
-                     ORDER BY q.created_at DESC
-                     LIMIT 10
-                    """, (company_id,)
-                )
-                questions_data = cur.fetchall()
-                # Convert to expected format using actual question text
-                questions = []
-                for row in questions_data:
-                    question_text = row[3]  # question_text is 4th column (index 3)
-                    category = row[4]       # category is 5th column (index 4)
-                    priority = row[5]       # priority is 6th column (index 5)
-                    
-                    # Truncate long questions for table display
-                    display_text = question_text[:80] + "..." if len(question_text) > 80 else question_text
-                    priority_text = {1: "Low", 3: "Medium", 5: "High"}.get(priority, "Medium")
-                    
-                    questions.append((display_text, "Open", priority_text))
-            except Exception as e:
-                logger.warning(f"Questions query failed: {e}. Using empty questions list.")
-                questions = []
-
-            # Generate PDF
-            pdf = Report(company_id)
-            pdf.add_page()
-
-            # Metrics table - optimized for landscape A4 (297mm width, ~270mm usable)
-            headers = ['Line Item','Period','Type','Value','Currency','Source','Page','Notes']
-            col_widths = [35, 20, 15, 25, 20, 45, 12, 50]  # Total: 222mm
-            max_chars = [12, 8, 6, 10, 8, 20, 4, 25]  # Character limits per column
-            
-            # Remove 'Status' column and truncate source filenames in data
-            metrics_clean = []
-            for row in metrics:
-                clean_row = list(row[:8])  # Remove status column (take first 8 columns)
-                # Truncate source filename
-                if len(clean_row) > 5 and clean_row[5]:  # Source column
-                    filename = str(clean_row[5])
-                    if '.' in filename:
-                        name_part = filename.split('.')[0]
-                        if len(name_part) > 18:
-                            clean_row[5] = name_part[:15] + '...'
-                        else:
-                            clean_row[5] = name_part
-                metrics_clean.append(clean_row)
-            
-            pdf.add_table_with_wrap(metrics_clean, headers, col_widths, max_chars)
+        rows = _fetch_report_rows(conn, REPORT_ROWS_SQL, company_id)
+    except Exception as e:
+        logger.warning("Questions query failed: %s. Using empty questions list.", e)
+        if not conn.autocommit:
+            conn.rollback()
+        rows = _fetch_report_rows(conn, METRICS_ROWS_SQL, company_id)
 
-            # Add page break before questions
-            pdf.add_page()
-            
-            # Questions table - optimized for landscape
-            q_headers = ['Question','Status','Priority']
-            q_col_widths = [180, 40, 35]  # Total: 255mm
-            q_max_chars = [80, 12, 8]  # Character limits
-            pdf.add_table_with_wrap(questions, q_headers, q_col_widths, q_max_chars)
+    # Split the tagged rows back into the two tables in a single pass
+    metrics_clean = []
+    questions = []
+    for row in rows:
+        if row[10] == 'm':
+            metrics_clean.append(_clean_metric_row(row))
+        else:
+            # Question rows carry question_text in column 0 and priority in column 8;
+            # long questions are truncated for table display
+            questions.append((_truncate(row[0], 80), "Open", PRIORITY_LABELS.get(row[8], "Medium")))
+    del rows
+
+    # Generate PDF
+    pdf = Report(company_id)
+    pdf.add_page()
+
+    # Metrics table - optimized for landscape A4 (297mm width, ~270mm usable)
+    headers = ['Line Item','Period','Type','Value','Currency','Source','Page','Notes']
+    col_widths = [35, 20, 15, 25, 20, 45, 12, 50]  # Total: 222mm
+    max_chars = [12, 8, 6, 10, 8, 20, 4, 25]  # Character limits per column
+    
+    pdf.add_table_with_wrap(metrics_clean, headers, col_widths, max_chars)
+    # Rows are already laid out on the pages; drop them before output builds the file
+    del metrics_clean
 
-            pdf.output(output_path)
-            logger.info(f"PDF written to {output_path}")
+    # Add page break before questions
+    pdf.add_page()
+    
+    # Questions table - optimized for landscape
+    q_headers = ['Question','Status','Priority']
+    q_col_widths = [180, 40, 35]  # Total: 255mm
+    q_max_chars = [80, 12, 8]  # Character limits
+    pdf.add_table_with_wrap(questions, q_headers, q_col_widths, q_max_chars)
+    del questions
+
+    pdf.output(output_path)
+    logger.info("PDF written to %s", output_path)
+
+
+def generate_report(company_id: int, output_path: str):
+    logger.info("Starting report generation for company_id=%s", company_id)
+    try:
+        with get_db_connection() as conn:
+            _render_report(conn, company_id, output_path)
 
             # Record metadata
-            cur.execute(
-                "INSERT INTO generated_reports (company_id, report_type, file_path, created_at) VALUES (%s, %s, %s, %s)",
-                (company_id, 'financial_analysis', output_path, datetime.datetime.now())
-            )
+            cur = conn.cursor()
+            cur.execute(INSERT_REPORT_SQL, (company_id, 'financial_analysis', output_path))
             conn.commit()
             logger.info("Metadata recorded in generated_reports")
 
     except Exception:
         logger.exception("Error generating report")
-        sys.exit(1)
+        raise
 
 
 if __name__ == "__main__":
@@ -258,4 +324,7 @@ if __name__ == "__main__":
         sys.exit(1)
     company_id = int(sys.argv[1])
     output_path = sys.argv[2]
-    generate_report(company_id, output_path)
+    try:
+        generate_report(company_id, output_path)
+    except Exception:
+        sys.exit(1)
@@ -111,9 +111,13 @@ def log_with_context(logger: logging.Logger, level: str, message: str, **context
         message: Log message
         **context: Additional context data
     """
+    levelno = getattr(logging, level.upper())
+    # logger.handle() skips the level check, so filter here before building the record
+    if not logger.isEnabledFor(levelno):
+        return
     record = logger.makeRecord(
         logger.name, 
-        getattr(logging, level.upper()),
+        levelno,
         __file__, 
         0, 
         message, 
@@ -1,5 +1,7 @@
 import psycopg2
 import json
+import copy
+import threading
 from datetime import datetime, date
 import os
 from dotenv import load_dotenv
@@ -55,11 +57,36 @@ def clean_numeric_value(value_str):
     except (ValueError, TypeError):
         return None
 
+# Use the libyaml C parser when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as YamlSafeLoader
+except ImportError:
+    from yaml import SafeLoader as YamlSafeLoader
+
+# Parsed YAML files keyed by absolute path: (mtime_ns, size, data)
+_YAML_CACHE = {}
+_YAML_CACHE_LOCK = threading.Lock()
+
+def load_yaml_cached(file_path):
+    """
+    Parse a YAML file once and serve copies of the result until the file's
+    mtime or size changes. Callers get a deep copy so they can't mutate the cache.
+    """
+    path = os.path.abspath(file_path)
+    st = os.stat(path)
+    with _YAML_CACHE_LOCK:
+        cached = _YAML_CACHE.get(path)
+        if cached is None or cached[:2] != (st.st_mtime_ns, st.st_size):
+            with open(path, 'r') as f:
+                data = yaml.load(f, Loader=YamlSafeLoader)
+            cached = (st.st_mtime_ns, st.st_size, data)
+            _YAML_CACHE[path] = cached
+    return copy.deepcopy(cached[2])
+
 def load_yaml_config(file_path):
     """Load and return a YAML configuration file."""
     try:
-        with open(file_path, 'r') as f:
-            return yaml.safe_load(f)
+        return load_yaml_cached(file_path)
     except Exception as e:
         log_event('yaml_load_error', {'file': file_path, 'error': str(e)})
         raise ValueError(f"Failed to load YAML config {file_path}: {e}")
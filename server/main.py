@@ -5,12 +5,14 @@ Consolidated single-backend architecture replacing Node.js + Python
 """
 
 import sys
+import importlib.util
+from contextlib import asynccontextmanager
 from pathlib import Path
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import FileResponse, JSONResponse, ORJSONResponse
 import uvicorn
 
 # Add app directory to Python path
@@ -23,11 +25,29 @@ from app.core.metrics_middleware import add_metrics_middleware
 from app.core.monitoring import enhanced_logger
 from app.core.error_tracking import error_tracker, track_exception
 
+# Runtime directories, created once when the server starts rather than on import
+REPORTS_DIR = settings.project_root / "reports"
+DATA_DIRECTORIES = [settings.project_root / "data", REPORTS_DIR, settings.project_root / "uploads"]
+
+# Serialise responses with orjson when it is installed, otherwise the stdlib json encoder
+DefaultResponse = ORJSONResponse if importlib.util.find_spec("orjson") else JSONResponse
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Ensure directories exist
+    for directory in DATA_DIRECTORIES:
+        directory.mkdir(exist_ok=True)
+    yield
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title=settings.title,
     description=settings.description,
-    version=settings.version
+    version=settings.version,
+    default_response_class=DefaultResponse,
+    lifespan=lifespan
 )
 
 # Add rate limiting middleware first
@@ -46,15 +66,34 @@ app.add_middleware(
     allow_headers=settings.security.cors_allow_headers,
 )
 
+class ReportsBypassGZipMiddleware(GZipMiddleware):
+    """GZip responses except report PDFs, which are already compressed and served via sendfile"""
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith("/reports/"):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+# Compress JSON list responses; small bodies aren't worth the CPU
+app.add_middleware(ReportsBypassGZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # Setup logging
 logger = setup_logger('financial-data-api')
 
-# Ensure directories exist
-for directory in [settings.project_root / "data", settings.project_root / "reports", settings.project_root / "uploads"]:
-    directory.mkdir(exist_ok=True)
-
-# Serve static files
-app.mount("/reports", StaticFiles(directory=str(settings.project_root / "reports")), name="reports")
+# Serve generated reports; FileResponse lets the server use sendfile for the body
+@app.api_route("/reports/{name}", methods=["GET", "HEAD"], include_in_schema=False)
+async def serve_report(name: str):
+    report_path = REPORTS_DIR / name
+    if name != Path(name).name or name.startswith(".") or not report_path.is_file():
+        raise HTTPException(status_code=404)
+    return FileResponse(
+        report_path,
+        media_type="application/pdf",
+        filename=name,
+        content_disposition_type="inline"
+    )
 
 # Include API router
 app.include_router(api_router)
@@ -68,7 +107,7 @@ app.include_router(errors_router, prefix="/api/monitoring", tags=["monitoring"])
 # Error handlers
 @app.exception_handler(404)
 async def not_found_handler(request, exc):
-    return JSONResponse(
+    return DefaultResponse(
         status_code=404,
         content={
             "error": "Not found",
@@ -99,7 +138,7 @@ async def internal_error_handler(request, exc):
         error_id=error_id
     )
     
-    return JSONResponse(
+    return DefaultResponse(
         status_code=500,
         content={
             "error": "Internal server error",
@@ -0,0 +1,48 @@
+"""
+Test cases for previous-period resolution in calc_metrics
+"""
+
+from datetime import date
+
+from app.services.calc_metrics import get_previous_periods
+
+
+QUARTERLY_PERIODS = [
+    {"period_label": "Q1 2024", "start_date": date(2024, 1, 1)},
+    {"period_label": "Q2 2024", "start_date": date(2024, 4, 1)},
+    {"period_label": "Q3 2024", "start_date": date(2024, 7, 1)},
+]
+
+
+def test_previous_month_rolls_over_year():
+    """Test MoM maps January to the previous December and mid-month starts to the prior month"""
+    prev_month, _, _ = get_previous_periods({date(2025, 1, 1), date(2025, 3, 15)}, QUARTERLY_PERIODS)
+
+    assert prev_month[date(2025, 1, 1)] == date(2024, 12, 1)
+    assert prev_month[date(2025, 3, 15)] == date(2025, 2, 1)
+
+
+def test_previous_quarter_90_day_boundary():
+    """Test QoQ picks the latest quarter starting on or before start_date - 90 days"""
+    _, prev_quarter, _ = get_previous_periods({date(2024, 6, 30), date(2024, 6, 29)}, QUARTERLY_PERIODS)
+
+    # 2024-06-30 - 90 days is exactly 2024-04-01, the Q2 start
+    assert prev_quarter[date(2024, 6, 30)] == "Q2 2024"
+    # One day earlier falls back to Q1
+    assert prev_quarter[date(2024, 6, 29)] == "Q1 2024"
+
+
+def test_previous_quarter_missing_when_none_earlier():
+    """Test QoQ has no entry when no quarter starts early enough"""
+    _, prev_quarter, _ = get_previous_periods({date(2024, 3, 1)}, QUARTERLY_PERIODS)
+
+    assert date(2024, 3, 1) not in prev_quarter
+
+
+def test_previous_year_skips_29_february():
+    """Test YoY maps to the same date a year earlier, with no entry for 29 February"""
+    _, _, prev_year = get_previous_periods({date(2024, 2, 29), date(2024, 3, 1), None}, QUARTERLY_PERIODS)
+
+    assert date(2024, 2, 29) not in prev_year
+    assert prev_year[date(2024, 3, 1)] == date(2023, 3, 1)
+    assert None not in prev_year
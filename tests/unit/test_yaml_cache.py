@@ -0,0 +1,42 @@
+"""
+Test cases for the cached YAML loader
+"""
+
+import os
+
+from app.utils.utils import load_yaml_cached
+
+
+def test_load_yaml_cached_returns_isolated_copies(tmp_path):
+    """Test that mutating a loaded config doesn't leak into later loads"""
+    config = tmp_path / "config.yaml"
+    config.write_text("fields:\n  revenue:\n    synonyms: [sales]\n")
+
+    first = load_yaml_cached(str(config))
+    first["fields"]["revenue"]["synonyms"].append("turnover")
+    first["extra"] = True
+
+    second = load_yaml_cached(str(config))
+    assert second == {"fields": {"revenue": {"synonyms": ["sales"]}}}
+
+
+def test_load_yaml_cached_reloads_when_size_changes(tmp_path):
+    """Test that rewriting the file with different content is picked up"""
+    config = tmp_path / "config.yaml"
+    config.write_text("value: 1\n")
+    assert load_yaml_cached(str(config)) == {"value": 1}
+
+    config.write_text("value: 1000\n")
+    assert load_yaml_cached(str(config)) == {"value": 1000}
+
+
+def test_load_yaml_cached_reloads_when_mtime_changes(tmp_path):
+    """Test that a same-size rewrite is picked up once the mtime moves"""
+    config = tmp_path / "config.yaml"
+    config.write_text("value: 1\n")
+    assert load_yaml_cached(str(config)) == {"value": 1}
+    mtime_ns = os.stat(config).st_mtime_ns
+
+    config.write_text("value: 2\n")
+    os.utime(config, ns=(mtime_ns + 1_000_000_000, mtime_ns + 1_000_000_000))
+    assert load_yaml_cached(str(config)) == {"value": 2}